@@ -3,30 +3,268 @@ TTF转SVG转换器 - 完整版本
 支持批量转换、字体信息显示、自定义样式等功能
 """
 
+from typing import (Any, BinaryIO, Callable, ClassVar, Dict, Iterable, Iterator, List,
+                    Optional, Protocol, Tuple, Type, Union, overload)
+
 from fontTools.ttLib import TTFont
 from fontTools.pens.svgPathPen import SVGPathPen
 from fontTools.pens.recordingPen import RecordingPen
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import io
 import os
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import pickle
+import sys
+import threading
+import tarfile
+import weakref
+import zipfile
+
+
+Point = Tuple[float, float]
+# (路径命令, advance width, lsb)
+GlyphEntry = Tuple[str, int, int]
+
+
+class _SVGWriter(Protocol):
+    """批量转换的输出目标：目录、压缩包或内存"""
+    
+    def write(self, name: str, content: Union[str, bytes]) -> None: ...
+    
+    def close(self) -> None: ...
+
+
+def _format_number(value: float) -> str:
+    """格式化坐标数值（整数原样输出，浮点数最多保留两位小数并去掉多余的0）"""
+    if isinstance(value, int):
+        return str(value)
+    if value.is_integer():
+        return str(int(value))
+    text = f"{value:.2f}".rstrip('0').rstrip('.')
+    return "0" if text == "-0" else text
+
+
+class _NumberStringCache(dict):
+    """
+    坐标数值 → 字符串 的缓存
+    
+    字形坐标大多是重复出现的小整数，命中时dict.__getitem__直接在C层返回，
+    省去每个坐标一次Python函数调用；超过max_size后整体清空以限制内存
+    """
+    
+    def __init__(self, max_size: int = 1 << 16) -> None:
+        super().__init__()
+        self.max_size = max_size
+    
+    def __missing__(self, value: float) -> str:
+        if len(self) >= self.max_size:
+            self.clear()
+        text = self[value] = _format_number(value)
+        return text
+
+
+_number_strings = _NumberStringCache()
+
+
+class FastSVGPathPen(SVGPathPen):
+    """
+    SVGPathPen 的快速版本
+    
+    直接用 f-string 拼接每条路径命令，避免 pointToString 中的生成器和
+    逐段字符串拼接；所有命令先追加到列表，最后由 getCommands 一次性 join；
+    坐标格式化默认走共享的 _number_strings 缓存
+    
+    注意：默认的数值格式与 SVGPathPen 不同——整数值的浮点数输出为整数，
+    其余浮点数最多保留两位小数；需要与 SVGPathPen 完全一致时传入 ntos=str
+    """
+    
+    _lastCommand: Optional[str]
+    _lastX: Optional[float]
+    _lastY: Optional[float]
+    
+    def __init__(self, glyphSet: Any,
+                 ntos: Callable[[float], str] = _number_strings.__getitem__) -> None:
+        super().__init__(glyphSet, ntos)
+    
+    def reset(self) -> None:
+        """清空已记录的路径命令，以便绘制下一个字形"""
+        self._commands.clear()
+        self._lastCommand = None
+        self._lastX = self._lastY = None
+    
+    def _moveTo(self, pt: Point) -> None:
+        if self._lastCommand == "M":
+            self._commands.pop()
+        ntos = self._ntos
+        x, y = pt
+        self._commands.append(f"M{ntos(x)} {ntos(y)}")
+        self._lastCommand = "M"
+        self._lastX, self._lastY = x, y
+    
+    def _lineTo(self, pt: Point) -> None:
+        x, y = pt
+        lastX, lastY = self._lastX, self._lastY
+        ntos = self._ntos
+        if x == lastX:
+            if y == lastY:  # 重复点
+                return
+            self._commands.append(f"V{ntos(y)}")
+            self._lastCommand = "V"
+        elif y == lastY:
+            self._commands.append(f"H{ntos(x)}")
+            self._lastCommand = "H"
+        elif self._lastCommand == "M":
+            self._commands.append(f" {ntos(x)} {ntos(y)}")
+        else:
+            self._commands.append(f"L{ntos(x)} {ntos(y)}")
+            self._lastCommand = "L"
+        self._lastX, self._lastY = x, y
+    
+    def _curveToOne(self, pt1: Point, pt2: Point, pt3: Point) -> None:
+        ntos = self._ntos
+        x3, y3 = pt3
+        self._commands.append(
+            f"C{ntos(pt1[0])} {ntos(pt1[1])} {ntos(pt2[0])} {ntos(pt2[1])} "
+            f"{ntos(x3)} {ntos(y3)}")
+        self._lastCommand = "C"
+        self._lastX, self._lastY = x3, y3
+    
+    def _qCurveToOne(self, pt1: Point, pt2: Point) -> None:
+        ntos = self._ntos
+        x2, y2 = pt2
+        self._commands.append(
+            f"Q{ntos(pt1[0])} {ntos(pt1[1])} {ntos(x2)} {ntos(y2)}")
+        self._lastCommand = "Q"
+        self._lastX, self._lastY = x2, y2
 
 
 class TTFtoSVGConverter:
     """TTF转SVG转换器类"""
     
-    def __init__(self, ttf_path):
+    # (真实路径, 修改时间) → 已解析的TTFont，供 from_cache 在多个转换器间共享
+    _font_cache: ClassVar["weakref.WeakValueDictionary[Tuple[str, float], TTFont]"] = \
+        weakref.WeakValueDictionary()
+    
+    def __init__(self, ttf_path: str, font: Optional[TTFont] = None) -> None:
         """
         初始化转换器
         
         参数:
             ttf_path: TTF字体文件路径
+            font: 已加载的TTFont对象（可选，默认从ttf_path加载）
         """
         self.ttf_path = ttf_path
-        self.font = TTFont(ttf_path)
+        # 字体从文件加载时记录 (真实路径, 修改时间)，并行转换据此判断工作进程能否直接重新加载该文件
+        self._font_key: Optional[Tuple[str, float]] = None
+        # 只有自己加载的字体才由 close() 关闭，外部传入或共享的字体不受影响
+        self._owns_font = font is None
+        self._closed = False
+        if font is None:
+            self._font_key = _font_file_key(ttf_path)
+            font = TTFont(ttf_path)
+        self.font = font
         self.glyphset = self.font.getGlyphSet()
+        self._pen = FastSVGPathPen(self.glyphset)
         self.font_name = self._get_font_name()
         
-    def _get_font_name(self):
+        # 缓存常用度量表，避免在渲染循环中重复查表
+        self._hmtx_metrics = self.font['hmtx'].metrics
+        self._hhea = self.font['hhea']
+        self._maxp = self.font['maxp']
+        self._os2 = self.font.get('OS/2')
+        self._ascent, self._descent = self._hhea.ascent, self._hhea.descent
+        self._line_height_base = self._ascent - self._descent
+        self._glyph_width_cache: Dict[str, Tuple[int, int]] = {}
+        
+        # 字形名 → (路径命令, advance width, lsb)，跨调用复用已绘制的字形
+        self._path_cache: Dict[str, GlyphEntry] = {}
+        
+        # 字形名 → glyphset中的字形对象，避免重复构造字形包装对象
+        self._glyph_cache: Dict[str, Any] = {}
+        
+        # 码位 → 字形名 映射，只在初始化时构建一次
+        self._best_cmap = self._get_best_cmap()
+        self._sorted_cps = sorted(self._best_cmap)
+        self._cp_to_glyphname = self._build_cp_map()
+        
+    @classmethod
+    def from_cache(cls, ttf_path: str) -> "TTFtoSVGConverter":
+        """
+        创建转换器，同一字体文件只解析一次
+        
+        只要还有转换器引用该字体，相同路径且未被修改的文件会复用同一个TTFont，
+        每个转换器只重新构建自己的缓存
+        
+        参数:
+            ttf_path: TTF字体文件路径
+        
+        返回:
+            TTFtoSVGConverter: 新的转换器
+        """
+        key = _font_file_key(ttf_path)
+        font = cls._font_cache.get(key)
+        if font is None:
+            font = TTFont(ttf_path)
+            cls._font_cache[key] = font
+        converter = cls(ttf_path, font=font)
+        converter._font_key = key
+        return converter
+    
+    def close(self) -> None:
+        """
+        释放对字体及各类缓存的引用
+        
+        转换器自己加载的字体会被关闭；关闭后再调用转换方法会抛出ValueError
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.clear_cache()
+        if self._owns_font:
+            self.font.close()
+        self.font = None
+        self.glyphset = None
+        # 复用原有的画笔，只清空命令并断开对glyphset的引用
+        self._pen.reset()
+        self._pen.glyphSet = None
+        # _best_cmap是字体自身的cmap字典，可能与其他转换器共享，只解除引用不清空
+        self._best_cmap = {}
+        self._sorted_cps = []
+        self._cp_to_glyphname = {}
+        self._hmtx_metrics = None
+        self._hhea = None
+        self._maxp = None
+        self._os2 = None
+    
+    def _check_open(self) -> None:
+        """转换器已关闭时抛出明确的异常"""
+        if self._closed:
+            raise ValueError(f"转换器已关闭: {self.ttf_path}")
+    
+    def _worker_font_source(self) -> Union[str, bytes]:
+        """
+        工作进程重建字体所需的数据
+        
+        字体由未改动的ttf_path加载时直接返回路径，否则把当前字体序列化为字节，
+        保证并行转换与串行转换使用的是同一份字体
+        """
+        if self._font_key is not None:
+            try:
+                if _font_file_key(self.ttf_path) == self._font_key:
+                    return self.ttf_path
+            except OSError:
+                pass
+        # 保存时不重算边界框，否则部分复合字形的lsb会被改写，渲染结果与当前字体不一致
+        buffer = io.BytesIO()
+        recalc_bboxes = self.font.recalcBBoxes
+        self.font.recalcBBoxes = False
+        try:
+            self.font.save(buffer)
+        finally:
+            self.font.recalcBBoxes = recalc_bboxes
+        return buffer.getvalue()
+    
+    def _get_font_name(self) -> str:
         """获取字体名称"""
         try:
             # 尝试从name表获取字体名称
@@ -37,42 +275,106 @@ class TTFtoSVGConverter:
             pass
         return os.path.splitext(os.path.basename(self.ttf_path))[0]
     
-    def get_font_info(self):
-        """获取字体信息"""
-        info = {
-            'font_name': self.font_name,
-            'num_glyphs': self.font['maxp'].numGlyphs,
-            'ascent': self.font['hhea'].ascent,
-            'descent': self.font['hhea'].descent,
-            'x_height': getattr(self.font.get('OS/2'), 'sxHeight', 'N/A'),
-            'cap_height': getattr(self.font.get('OS/2'), 'sCapHeight', 'N/A'),
-        }
-        return info
-    
-    def get_available_chars(self, start_code=0x4E00, end_code=0x9FA5):
-        """获取字体支持的字符列表（默认中文字符范围）"""
-        cmap = None
+    def _get_best_cmap(self) -> Dict[int, str]:
+        """选取cmap子表（优先Windows Unicode子表）"""
         for table in self.font['cmap'].tables:
             if table.platformID == 3 and table.platEncID in [1, 10]:  # Windows
-                cmap = table.cmap
-                break
+                return table.cmap
         
+        cmap = self.font.getBestCmap()
         if cmap is None:
             for table in self.font['cmap'].tables:
                 cmap = table.cmap
                 break
+        return cmap or {}
+    
+    def _build_cp_map(self) -> Dict[int, str]:
+        """构建码位到字形名的映射（优先使用 uniXXXX 命名的字形）"""
+        cp_map = {}
+        for cp, name in self._best_cmap.items():
+            uni_name = f'uni{cp:X}'
+            cp_map[cp] = uni_name if uni_name in self.glyphset else name
+        return cp_map
+    
+    def _get_metrics(self, glyph_name: str) -> Tuple[int, int]:
+        """获取字形的 (advance width, lsb)，结果按字形名缓存"""
+        metrics = self._glyph_width_cache.get(glyph_name)
+        if metrics is None:
+            metrics = self._hmtx_metrics[glyph_name]
+            self._glyph_width_cache[glyph_name] = metrics
+        return metrics
+    
+    def _get_glyph(self, glyph_name: str) -> Any:
+        """获取字形对象，结果按字形名缓存"""
+        glyph = self._glyph_cache.get(glyph_name)
+        if glyph is None:
+            glyph = self._glyph_cache[glyph_name] = self.glyphset[glyph_name]
+        return glyph
+    
+    def _render_glyph(self, glyph_name: str) -> GlyphEntry:
+        """绘制字形并返回 (路径命令, advance width, lsb)，结果按字形名缓存"""
+        entry = self._path_cache.get(glyph_name)
+        if entry is None:
+            pen = self._pen
+            pen.reset()
+            self._get_glyph(glyph_name).draw(pen)
+            width, lsb = self._get_metrics(glyph_name)
+            entry = (pen.getCommands(), width, lsb)
+            self._path_cache[glyph_name] = entry
+        return entry
+    
+    def _resolve_chars(self, text: Iterable[str]) -> Dict[str, Optional[GlyphEntry]]:
+        """
+        解析文本中出现的每个不同字符
         
-        if cmap:
-            chars = []
-            for code in range(start_code, end_code + 1):
-                if code in cmap:
-                    chars.append(chr(code))
-            return chars
-        return []
-    
-    def char_to_svg(self, char, output_path=None, fill_color="black", 
-                    stroke_color="none", stroke_width=0, 
-                    viewbox_method="metrics"):
+        返回:
+            dict: 字符 → (路径命令, advance width, lsb)，缺失或出错的字符为None
+        """
+        entries: Dict[str, Optional[GlyphEntry]] = {}
+        for char in dict.fromkeys(text):
+            glyph_name = self._cp_to_glyphname.get(ord(char))
+            if glyph_name is None:
+                entries[char] = None
+                continue
+            try:
+                entries[char] = self._render_glyph(glyph_name)
+            except Exception as e:
+                print(f"处理字符 '{char}' 时出错: {e}")
+                entries[char] = None
+        return entries
+    
+    def clear_cache(self) -> None:
+        """清空字形对象、路径和度量缓存"""
+        self._path_cache.clear()
+        self._glyph_cache.clear()
+        self._glyph_width_cache.clear()
+    
+    def get_font_info(self) -> Dict[str, Any]:
+        """获取字体信息"""
+        self._check_open()
+        info = {
+            'font_name': self.font_name,
+            'num_glyphs': self._maxp.numGlyphs,
+            'ascent': self._ascent,
+            'descent': self._descent,
+            'x_height': getattr(self._os2, 'sxHeight', 'N/A'),
+            'cap_height': getattr(self._os2, 'sCapHeight', 'N/A'),
+        }
+        return info
+    
+    def get_available_chars(self, start_code: int = 0x4E00,
+                            end_code: int = 0x9FA5) -> List[str]:
+        """获取字体支持的字符列表（默认中文字符范围）"""
+        self._check_open()
+        lo = bisect_left(self._sorted_cps, start_code)
+        hi = bisect_right(self._sorted_cps, end_code)
+        return [chr(code) for code in self._sorted_cps[lo:hi]]
+    
+    def char_to_svg(self, char: str, output_path: Optional[str] = None,
+                    fill_color: str = "black", stroke_color: str = "none",
+                    stroke_width: float = 0, viewbox_method: str = "metrics",
+                    minify: bool = False,
+                    pen: Optional[FastSVGPathPen] = None) -> str:
         """
         将单个字符转换为SVG
         
@@ -83,36 +385,38 @@ class TTFtoSVGConverter:
             stroke_color: 描边颜色
             stroke_width: 描边宽度
             viewbox_method: viewBox计算方式 ("metrics" 或 "bounds")
+            minify: 是否输出去掉缩进和换行的单行SVG
+            pen: 复用的FastSVGPathPen（默认使用转换器共享的画笔）
         
         返回:
             str: 生成的SVG内容
         """
-        # 获取字形名称
-        char_hex = format(ord(char), 'x').upper()
-        glyph_name = f'uni{char_hex}'
-        
-        # 检查字符是否存在
-        if glyph_name not in self.glyphset:
+        self._check_open()
+        # 获取字形名称并检查字符是否存在
+        glyph_name = self._cp_to_glyphname.get(ord(char))
+        if glyph_name is None:
             if char in self.glyphset:
                 glyph_name = char
             else:
                 raise ValueError(f"字符 '{char}' 不在字体文件中")
         
         # 获取字形
-        glyph = self.glyphset[glyph_name]
+        glyph = self._get_glyph(glyph_name)
         
-        # 使用SVGPathPen提取路径
-        pen = SVGPathPen(self.glyphset)
+        # 使用FastSVGPathPen提取路径
+        if pen is None:
+            pen = self._pen
+        pen.reset()
         glyph.draw(pen)
         
         # 计算viewBox
         if viewbox_method == "metrics":
             try:
-                width, lsb = self.font['hmtx'][glyph_name]
+                width, lsb = self._get_metrics(glyph_name)
             except:
                 width, lsb = 1000, 0
-            ascent, descent = self.font['hhea'].ascent, self.font['hhea'].descent
-            height = ascent - descent
+            ascent = self._ascent
+            height = self._line_height_base
             viewbox = f"{lsb} 0 {width} {height}"
         else:  # bounds
             glyph_bounds = glyph.bounds
@@ -127,7 +431,16 @@ class TTFtoSVGConverter:
                 ascent = 1000
         
         # 构建SVG内容
-        svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
+        if minify:
+            svg_content = (
+                f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="{viewbox}">'
+                f'<defs><style>.glyph{{fill:{fill_color};stroke:{stroke_color};'
+                f'stroke-width:{stroke_width}}}</style></defs>'
+                f'<g transform="matrix(1 0 0 -1 0 {ascent})">'
+                f'<path class="glyph" d="{pen.getCommands()}"/></g></svg>')
+        else:
+            svg_content = f'''<?xml version="1.0" encoding="UTF-8"?>
 <svg xmlns="http://www.w3.org/2000/svg" 
      version="1.1" 
      viewBox="{viewbox}">
@@ -153,132 +466,398 @@ class TTFtoSVGConverter:
         
         return svg_content
     
-    def batch_convert(self, chars, output_dir="output_svg", **kwargs):
+    def _convert_chars(self, chars: Iterable[str], writer: _SVGWriter,
+                       kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """逐个转换字符并交给writer写出，返回转换结果统计"""
+        results: Dict[str, Any] = {'success': 0, 'failed': 0, 'failed_chars': []}
+        
+        for char in chars:
+            try:
+                # 构建输出文件名
+                filename = f"u{ord(char):X}.svg"
+                
+                # 转换
+                svg_content = self.char_to_svg(char, **kwargs)
+                writer.write(filename, svg_content)
+                results['success'] += 1
+                
+            except Exception as e:
+                results['failed'] += 1
+                results['failed_chars'].append((char, str(e)))
+        
+        return results
+    
+    def batch_convert(self, chars: Iterable[str], output_dir: str = "output_svg",
+                      max_workers: Optional[int] = 1, chunk_size: int = 256,
+                      output_mode: str = "dir", **kwargs: Any) -> Dict[str, Any]:
         """
         批量转换字符为SVG文件
         
+        默认串行转换；max_workers大于1时字符按chunk_size分片交给进程池并行转换，
+        每个工作进程只在初始化时加载一次字体，之后只接收分片；kwargs无法pickle时
+        退回线程池，字符数不超过一个分片时仍直接串行转换。并行转换需要调用方
+        代码位于 if __name__ == "__main__" 保护之下
+        
         参数:
             chars: 字符列表或迭代器
-            output_dir: 输出目录
+            output_dir: 输出目录（"zip"/"tar"模式下为压缩包路径，缺少扩展名时自动补上）
+            max_workers: 并行进程数（默认1即串行，None表示os.cpu_count()）
+            chunk_size: 每个分片的字符数
+            output_mode: 输出方式 ("dir"、"zip" 或 "tar"；只有zip/tar把所有字形写入单个文件，
+                         可减少文件系统开销)
             **kwargs: 其他传递给char_to_svg的参数
         
         返回:
             dict: 转换结果统计
         """
-        # 创建输出目录
-        os.makedirs(output_dir, exist_ok=True)
+        self._check_open()
+        if output_mode not in _OUTPUT_WRITERS:
+            raise ValueError(f"不支持的输出方式: {output_mode}")
         
-        # 统计结果
-        results = {'success': 0, 'failed': 0, 'failed_chars': []}
+        chars = list(chars)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
         
-        for char in chars:
-            try:
-                # 构建输出文件名
-                char_hex = format(ord(char), 'x').upper()
-                output_path = os.path.join(output_dir, f"u{char_hex}.svg")
+        # 目录模式每个分片直接写文件；压缩包模式由主进程统一写入同一个文件
+        writer: _SVGWriter
+        if output_mode == "dir":
+            os.makedirs(output_dir, exist_ok=True)
+            writer = _DirWriter(output_dir)
+        else:
+            archive_path = output_dir.rstrip('/' + os.sep)
+            if not archive_path.endswith(f".{output_mode}"):
+                archive_path += f".{output_mode}"
+            parent_dir = os.path.dirname(archive_path)
+            if parent_dir:
+                os.makedirs(parent_dir, exist_ok=True)
+            writer = _OUTPUT_WRITERS[output_mode](archive_path)
+        
+        try:
+            if max_workers <= 1 or len(chars) <= chunk_size:
+                results = self._convert_chars(chars, writer, kwargs)
+            else:
+                results = {'success': 0, 'failed': 0, 'failed_chars': []}
+                chunks = [chars[i:i + chunk_size]
+                          for i in range(0, len(chars), chunk_size)]
                 
-                # 转换
-                self.char_to_svg(char, output_path, **kwargs)
-                results['success'] += 1
+                executor_cls: Type[Executor]
+                try:
+                    pickle.dumps(kwargs)
+                    executor_cls = ProcessPoolExecutor
+                except Exception:
+                    executor_cls = ThreadPoolExecutor
                 
-            except Exception as e:
-                results['failed'] += 1
-                results['failed_chars'].append((char, str(e)))
+                initargs = (self.ttf_path, self._worker_font_source(),
+                            output_dir, output_mode, kwargs)
+                with executor_cls(max_workers=max_workers,
+                                  initializer=_init_worker,
+                                  initargs=initargs) as executor:
+                    futures = [executor.submit(_convert_chunk, chunk)
+                               for chunk in chunks]
+                    # 按提交顺序收集结果，保证失败列表和压缩包成员顺序稳定
+                    done = 0
+                    for future in futures:
+                        chunk_results, entries = future.result()
+                        for name, data in entries:
+                            writer.write(name, data)
+                        results['success'] += chunk_results['success']
+                        results['failed'] += chunk_results['failed']
+                        results['failed_chars'].extend(chunk_results['failed_chars'])
+                        done += chunk_results['success'] + chunk_results['failed']
+                        print(f"  进度: {done}/{len(chars)}")
+        finally:
+            writer.close()
         
-        # 打印统计
-        print(f"\n转换完成:")
-        print(f"  ✓ 成功: {results['success']}")
-        print(f"  ✗ 失败: {results['failed']}")
+        # 打印统计（汇总后一次性输出）
+        report = [
+            "\n转换完成:",
+            f"  ✓ 成功: {results['success']}",
+            f"  ✗ 失败: {results['failed']}",
+        ]
         
         if results['failed_chars']:
-            print(f"\n失败的字符:")
+            report.append("\n失败的字符:")
             for char, error in results['failed_chars']:
-                print(f"  '{char}': {error}")
+                report.append(f"  '{char}': {error}")
+        
+        sys.stdout.write("\n".join(report) + "\n")
         
         return results
     
-    def text_to_svg(self, text, output_path=None, line_height=1.2, **kwargs):
+    @overload
+    def text_to_svg(self, text: str, output_path: Optional[str] = ...,
+                    line_height: float = ..., minify: bool = ...,
+                    file: None = ..., **kwargs: Any) -> str: ...
+    
+    @overload
+    def text_to_svg(self, text: str, output_path: Optional[str] = ...,
+                    line_height: float = ..., minify: bool = ..., *,
+                    file: BinaryIO, **kwargs: Any) -> int: ...
+    
+    def text_to_svg(self, text: str, output_path: Optional[str] = None,
+                    line_height: float = 1.2, minify: bool = False,
+                    file: Optional[BinaryIO] = None,
+                    **kwargs: Any) -> Union[str, int]:
         """
         将文本转换为SVG文件
         
+        指定file时逐个字形流式写出，不在内存中拼接完整的SVG
+        
         参数:
             text: 要转换的文本
             output_path: 输出文件路径
             line_height: 行高倍数
+            minify: 是否输出去掉缩进和换行的单行SVG
+            file: 以二进制方式打开的可写文件对象（指定时忽略output_path）
             **kwargs: 其他样式参数
         
         返回:
-            str: 生成的SVG内容
+            str: 生成的SVG内容；指定file时返回写入的字节数
         """
+        self._check_open()
+        chunks = self._iter_text_svg(text, line_height, minify,
+                                     kwargs.get('fill_color', 'black'))
+        
+        if file is not None:
+            return sum(file.write(chunk.encode('utf-8')) for chunk in chunks)
+        
+        # 先生成完整内容再写文件，生成中途出错不会留下截断的文件
+        svg_content = ''.join(chunks)
+        
+        if output_path:
+            with open(output_path, 'wb') as f:
+                f.write(svg_content.encode('utf-8'))
+            print(f"✓ 文本已转换为 {output_path}")
+        
+        return svg_content
+    
+    def _iter_text_svg(self, text: str, line_height: float, minify: bool,
+                       fill_color: str) -> Iterator[str]:
+        """按顺序生成text_to_svg输出的各个片段（头部、每个字形、尾部）"""
         lines = text.split('\n')
-        line_heights = []
         
-        # 计算每一行的宽度和高度
-        max_width = 0
-        total_height = 0
+        ascent = self._ascent
+        line_spacing = self._line_height_base * line_height
         
-        for i, line in enumerate(lines):
+        total_height = _format_number(len(lines) * line_spacing)
+        
+        # 预先解析文本中出现的每个字符，绘制循环中不再需要异常处理
+        entries = self._resolve_chars(text)
+        
+        # viewBox依赖最大行宽：字形已解析，这里只需累加缓存的宽度
+        max_width = 0
+        for line in lines:
             line_width = 0
             for char in line:
-                try:
-                    char_hex = format(ord(char), 'x').upper()
-                    glyph_name = f'uni{char_hex}'
-                    if glyph_name in self.glyphset:
-                        width, _ = self.font['hmtx'][glyph_name]
-                        line_width += width
-                except:
-                    line_width += 1000  # 默认宽度
-            
+                entry = entries[char]
+                line_width += 1000 if entry is None else entry[1]  # 缺失字符使用默认宽度
             max_width = max(max_width, line_width)
         
-        ascent, descent = self.font['hhea'].ascent, self.font['hhea'].descent
-        base_height = ascent - descent
-        line_spacing = base_height * line_height
-        
-        total_height = len(lines) * line_spacing
-        
-        # 构建SVG
-        svg_parts = [f'''<?xml version="1.0" encoding="UTF-8"?>
+        if minify:
+            yield (f'<?xml version="1.0" encoding="UTF-8"?>'
+                   f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+                   f'viewBox="0 0 {max_width} {total_height}">'
+                   f'<defs><style>.text{{fill:{fill_color}}}</style></defs>')
+        else:
+            yield f'''<?xml version="1.0" encoding="UTF-8"?>
 <svg xmlns="http://www.w3.org/2000/svg" 
      version="1.1" 
      viewBox="0 0 {max_width} {total_height}">
 <defs>
     <style>
         .text {{ 
-            fill: {kwargs.get('fill_color', 'black')}; 
+            fill: {fill_color}; 
         }}
     </style>
-</defs>''']
+</defs>'''
+        
         for i, line in enumerate(lines):
-            y_pos = (i + 1) * line_spacing
+            y_pos = _format_number((i + 1) * line_spacing)
             x_pos = 0
             for char in line:
-                try:
-                    char_hex = format(ord(char), 'x').upper()
-                    glyph_name = f'uni{char_hex}'
-                    if glyph_name in self.glyphset:
-                        glyph = self.glyphset[glyph_name]
-                        pen = SVGPathPen(self.glyphset)
-                        glyph.draw(pen)
-                        width, lsb = self.font['hmtx'][glyph_name]
-                        svg_parts.append(f'''    <g transform="translate({x_pos - lsb}, {y_pos}) scale(1, -1) translate(0, -{ascent})">
-        <path class="text" d="{pen.getCommands()}"/>
-    </g>''')
-                        x_pos += width
-                    else:
-                        x_pos += 1000
-                except Exception as e:
-                    print(f"处理字符 '{char}' 时出错: {e}")
-                    x_pos += 1000
-        svg_parts.append('</svg>')
-        svg_content = '\n'.join(svg_parts)
+                entry = entries[char]
+                if entry is None:
+                    x_pos += 1000  # 默认宽度
+                else:
+                    commands, width, lsb = entry
+                    yield _glyph_fragment(commands, x_pos - lsb, y_pos, ascent, minify)
+                    x_pos += width
         
-        if output_path:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(svg_content)
-            print(f"✓ 文本已转换为 {output_path}")
+        yield '</svg>' if minify else '\n</svg>'
+    
+    def to_sprite(self, chars: Iterable[str], output_path: str, columns: int = 16,
+                  fill_color: str = "black") -> List[str]:
+        """
+        将多个字符输出为单个SVG雪碧图
         
-        return svg_content
+        每个字符生成一个<symbol id="uXXXX">，并按最多columns列排成网格预览；
+        所有内容写入同一个bytearray后一次性写盘
+        
+        参数:
+            chars: 字符列表或迭代器
+            output_path: 输出文件路径
+            columns: 网格列数
+            fill_color: 填充颜色
+        
+        返回:
+            list: 生成的symbol id列表，顺序与chars一致（缺失字符被跳过）
+        
+        异常:
+            ValueError: columns小于1，或没有任何字符可以输出
+        """
+        self._check_open()
+        if columns < 1:
+            raise ValueError(f"列数必须大于0: {columns}")
+        
+        ascent = self._ascent
+        height = self._line_height_base
+        
+        entries = self._resolve_chars(chars)
+        glyphs = [(f"u{ord(char):X}", entry) for char, entry in entries.items()
+                  if entry is not None]
+        if not glyphs:
+            raise ValueError("没有可输出的字符（字符为空或均不在字体文件中）")
+        cell_width = max(entry[1] for _, entry in glyphs)
+        # 字符数少于列数时按实际字符数排列，避免viewBox右侧大片空白
+        columns = min(columns, len(glyphs))
+        rows = (len(glyphs) + columns - 1) // columns
+        
+        out = bytearray(f'''<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" 
+     xmlns:xlink="http://www.w3.org/1999/xlink" 
+     version="1.1" 
+     viewBox="0 0 {cell_width * columns} {height * rows}">
+<defs>
+    <style>
+        .glyph {{ 
+            fill: {fill_color}; 
+        }}
+    </style>'''.encode('utf-8'))
+        for symbol_id, (commands, width, lsb) in glyphs:
+            out += (f'\n    <symbol id="{symbol_id}" viewBox="{lsb} 0 {width} {height}">'
+                    f'\n        <path class="glyph" transform="matrix(1 0 0 -1 0 {ascent})" d="{commands}"/>'
+                    f'\n    </symbol>').encode('utf-8')
+        out += b'\n</defs>'
+        for i, (symbol_id, (_, width, _)) in enumerate(glyphs):
+            row, col = divmod(i, columns)
+            out += (f'\n<use xlink:href="#{symbol_id}" x="{col * cell_width}" '
+                    f'y="{row * height}" width="{width}" height="{height}"/>').encode('utf-8')
+        out += b'\n</svg>'
+        
+        with open(output_path, 'wb', buffering=1 << 20) as f:
+            f.write(out)
+        print(f"✓ {len(glyphs)} 个字符已合并为 {output_path}")
+        
+        return [symbol_id for symbol_id, _ in glyphs]
+
+
+def _glyph_fragment(commands: str, x: float, y: str, ascent: int,
+                    minify: bool = False) -> str:
+    """生成一个字形的<g>片段"""
+    if minify:
+        return (f'<g transform="translate({x},{y}) scale(1,-1) translate(0,-{ascent})">'
+                f'<path class="text" d="{commands}"/></g>')
+    return (f'\n    <g transform="translate({x}, {y}) scale(1, -1) translate(0, -{ascent})">'
+            f'\n        <path class="text" d="{commands}"/>'
+            f'\n    </g>')
+
+
+class _DirWriter:
+    """把每个SVG直接写成目录中的一个文件（每个字形一次打开/写入/关闭）"""
+    
+    def __init__(self, output_dir: str) -> None:
+        self.output_dir = output_dir
+        # 目录前缀只拼接一次，之后每个文件名直接字符串相加
+        self._prefix = os.path.join(output_dir, '')
+    
+    def write(self, name: str, content: Union[str, bytes]) -> None:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        with open(self._prefix + name, 'wb') as f:
+            f.write(data)
+    
+    def close(self) -> None:
+        pass
+
+
+class _MemoryWriter:
+    """把SVG暂存在内存中，用于工作进程把结果交回主进程写入压缩包"""
+    
+    def __init__(self) -> None:
+        self.entries: List[Tuple[str, bytes]] = []
+    
+    def write(self, name: str, content: Union[str, bytes]) -> None:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        self.entries.append((name, data))
+    
+    def close(self) -> None:
+        pass
+
+
+class _ZipWriter:
+    """把SVG写入单个不压缩的zip文件"""
+    
+    def __init__(self, path: str) -> None:
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+    
+    def write(self, name: str, content: Union[str, bytes]) -> None:
+        self._zip.writestr(name, content)
+    
+    def close(self) -> None:
+        self._zip.close()
+
+
+class _TarWriter:
+    """把SVG写入单个tar文件"""
+    
+    def __init__(self, path: str) -> None:
+        self._tar = tarfile.open(path, 'w')
+    
+    def write(self, name: str, content: Union[str, bytes]) -> None:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self._tar.addfile(info, io.BytesIO(data))
+    
+    def close(self) -> None:
+        self._tar.close()
+
+
+_OUTPUT_WRITERS: Dict[str, Callable[[str], _SVGWriter]] = {
+    'dir': _DirWriter, 'zip': _ZipWriter, 'tar': _TarWriter}
+
+
+def _font_file_key(ttf_path: str) -> Tuple[str, float]:
+    """字体文件的 (真实路径, 修改时间)，用于判断文件是否仍是加载时的版本"""
+    return os.path.realpath(ttf_path), os.path.getmtime(ttf_path)
+
+
+# 每个工作进程（线程池模式下为每个线程）各自持有的转换器和输出参数
+_worker_state = threading.local()
+
+
+def _init_worker(ttf_path: str, font_source: Union[str, bytes], output_dir: str,
+                 output_mode: str, kwargs: Dict[str, Any]) -> None:
+    """工作进程/线程初始化：只加载一次字体并保存批量转换参数"""
+    font = TTFont(io.BytesIO(font_source)) if isinstance(font_source, bytes) else None
+    _worker_state.converter = TTFtoSVGConverter(ttf_path, font=font)
+    _worker_state.output_dir = output_dir
+    _worker_state.output_mode = output_mode
+    _worker_state.kwargs = kwargs
+
+
+def _convert_chunk(chars: List[str]) -> Tuple[Dict[str, Any], List[Tuple[str, bytes]]]:
+    """批量转换的工作函数：用本进程/线程的转换器转换一个分片"""
+    state = _worker_state
+    writer: _SVGWriter
+    if state.output_mode == "dir":
+        writer = _DirWriter(state.output_dir)
+    else:
+        writer = _MemoryWriter()
+    try:
+        results = state.converter._convert_chars(chars, writer, state.kwargs)
+    finally:
+        writer.close()
+    return results, getattr(writer, 'entries', [])
 
 
 # 示例使用